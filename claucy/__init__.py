@@ -1 +1,2 @@
 from .claucy import *
+from .conllu import *
@@ -9,21 +9,44 @@ Clausie as a spacy library
 """
 
 import spacy
-import lemminflect
 import logging
 import typing
 
 from spacy.tokens import Span, Doc
 from spacy.matcher import Matcher
-from lemminflect import getInflection
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # DO NOT SET MANUALLY
 MOD_CONSERVATIVE = False
 
-Doc.set_extension("clauses", default=[], force=True)
-Span.set_extension("clauses", default=[], force=True)
+
+def _register_extensions():
+    # Registered when the component is added to a pipeline or run, rather
+    # than at import time
+    if not Doc.has_extension("clauses"):
+        Doc.set_extension("clauses", default=[], force=True)
+    if not Span.has_extension("clauses"):
+        Span.set_extension("clauses", default=[], force=True)
+
+
+# Arguments of `Clause.to_propositions' that have already been warned about
+_warned_arguments = set()
+
+
+def _warn_once(argument, message):
+    # Ignored arguments are warned about once per process, not once per call
+    if argument in _warned_arguments:
+        return
+    _warned_arguments.add(argument)
+    logger.warning(message)
+
+
+def _load_lemminflect():
+    # `lemminflect' registers the `inflect' token extension on import. It is
+    # only needed when rendering inflected text so it is imported lazily.
+    import lemminflect  # noqa: F401
+
 
 dictionary = {
     "non_ext_copular": """die walk""".split(),
@@ -200,10 +223,11 @@ class Clause:
         self, as_text: bool = False, inflect: str or None = "VBD", capitalize: bool = False
     ):
 
-        if inflect and not as_text:
-            logging.warning("`inflect' argument is ignored when `as_text==False'. To suppress this warning call `to_propositions' with the argument `inflect=None'")
-        if capitalize and not as_text:
-            logging.warning("`capitalize' argument is ignored when `as_text==False'. To suppress this warning call `to_propositions' with the argument `capitalize=False")
+        if not as_text:
+            if inflect:
+                _warn_once("inflect", "`inflect' argument is ignored when `as_text==False'. To suppress this warning call `to_propositions' with the argument `inflect=None'")
+            if capitalize:
+                _warn_once("capitalize", "`capitalize' argument is ignored when `as_text==False'. To suppress this warning call `to_propositions' with the argument `capitalize=False")
 
         propositions = []
 
@@ -276,6 +300,7 @@ def inflect_token(token, inflect):
         # t is not preceded by an auxiliary verb (e.g. `the birds were ailing`)
         and token.dep_ != "pcomp"
     ):  # t `dreamed of becoming a dancer`
+        _load_lemminflect()
         return str(token._.inflect(inflect))
     else:
         return str(token)
@@ -393,6 +418,7 @@ def extract_clauses(span):
 
 @spacy.Language.component('claucy')
 def extract_clauses_doc(doc):
+    _register_extensions()
     for sent in doc.sents:
         clauses = extract_clauses(sent)
         sent._.clauses = clauses
@@ -401,6 +427,7 @@ def extract_clauses_doc(doc):
 
 
 def add_to_pipe(nlp):
+    _register_extensions()
     nlp.add_pipe('claucy')
 
 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reading pre-parsed CoNLL-U input into spacy `Doc`s
+
+The `Doc`s are built directly from the CoNLL-U columns, so clauses can be
+extracted without loading a spacy model. Universal Dependencies labels are
+mapped to the (ClearNLP) labels that `extract_clauses` expects, and copular
+constructions are re-headed on the copula as the english spacy models do.
+Non-projective trees are made projective by attaching crossing dependents
+to the head of their head.
+"""
+
+import os
+import typing
+
+__all__ = ["read_conllu", "UD_TO_SPACY_DEPS"]
+
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+# Labels not listed here are kept as is (without their subtype)
+UD_TO_SPACY_DEPS = {
+    "root": "ROOT",
+    "obj": "dobj",
+    "iobj": "dative",
+    "nsubj:pass": "nsubjpass",
+    "csubj:pass": "csubjpass",
+    "aux:pass": "auxpass",
+    "obl": "prep",
+    "obl:agent": "agent",
+    "obl:tmod": "npadvmod",
+    "obl:npmod": "npadvmod",
+    "nmod": "prep",
+    "nmod:poss": "poss",
+    "nmod:tmod": "npadvmod",
+    "nmod:npmod": "npadvmod",
+    "det:poss": "poss",
+    "acl:relcl": "relcl",
+    "compound:prt": "prt",
+    "cc:preconj": "preconj",
+    "flat": "compound",
+    "fixed": "dep",
+    "goeswith": "dep",
+    "orphan": "dep",
+    "reparandum": "dep",
+    "dislocated": "dep",
+    "list": "dep",
+    "discourse": "intj",
+    "vocative": "npadvmod",
+}
+
+# Dependents of a predicate nominal/adjective that attach to the copula
+# once it becomes the head of the clause
+_CLAUSAL_DEPS = [
+    "nsubj",
+    "csubj",
+    "expl",
+    "aux",
+    "mark",
+    "punct",
+    "advcl",
+    "obl",
+    "parataxis",
+    "discourse",
+    "vocative",
+]
+
+
+def _map_dep(deprel):
+    if deprel in UD_TO_SPACY_DEPS:
+        return UD_TO_SPACY_DEPS[deprel]
+    base = deprel.split(":")[0]
+    return UD_TO_SPACY_DEPS.get(base, base)
+
+
+def _is_negation(morph):
+    return "Polarity=Neg" in morph.split("|")
+
+
+def _promote_copulas(upos, morphs, heads, deps):
+    """
+    Make copulas the heads of their clauses.
+
+    In UD the predicate of a copular clause (e.g. `smart' in `AE is smart')
+    is its head, while spacy attaches it to the copula as `acomp', `attr' or
+    (for prepositional predicates) `prep'. `heads' and `deps' are modified in
+    place. Labels assigned here are already spacy labels, and are returned as
+    a set of indices that must not be mapped again.
+    """
+    predicates = set(heads[j] for j, dep in enumerate(deps) if dep == "cop")
+    mapped = set()
+    for i, dep in enumerate(deps):
+        if dep != "cop" or heads[i] == i or heads[i] in mapped:
+            continue
+        pred = heads[i]
+
+        # The copula takes the place of the predicate in the tree
+        heads[i] = i if heads[pred] == pred else heads[pred]
+        deps[i] = deps[pred]
+
+        children = [
+            j for j, h in enumerate(heads) if h == pred and j not in (i, pred)
+        ]
+        if any(deps[j] == "case" for j in children):
+            deps[pred] = "prep"
+        elif upos[pred] == "ADJ":
+            deps[pred] = "acomp"
+        else:
+            deps[pred] = "attr"
+        heads[pred] = i
+        mapped.add(pred)
+
+        for j in children:
+            base = deps[j].split(":")[0]
+            if (
+                base in _CLAUSAL_DEPS
+                or deps[j] == "cc"
+                or (
+                    base == "conj"
+                    and (j in predicates or upos[j] in ["VERB", "AUX"])
+                )
+                or (base == "advmod" and _is_negation(morphs[j]))
+            ):
+                heads[j] = i
+    return mapped
+
+
+def _check_heads(heads, line):
+    # Every token must reach a root (a token that is its own head)
+    reaches_root = set()
+    for i in range(len(heads)):
+        path = []
+        j = i
+        while j not in reaches_root and heads[j] != j:
+            if j in path:
+                raise ValueError(
+                    "Sentence at line {}: heads form a cycle".format(line)
+                )
+            path.append(j)
+            j = heads[j]
+        reaches_root.update(path)
+
+
+def _dominates(heads, h, k):
+    while k != h:
+        if heads[k] == k:
+            return False
+        k = heads[k]
+    return True
+
+
+def _is_projective(heads, d):
+    h = heads[d]
+    return all(_dominates(heads, h, k) for k in range(min(h, d) + 1, max(h, d)))
+
+
+def _projectivize(heads):
+    """
+    Lift non-projective arcs to the grandparent of their dependent, shortest
+    arc first, until the tree is projective. Spans of the clause constituents
+    are taken from the leftmost to the rightmost token of a subtree, which is
+    only correct for projective trees. `heads' is modified in place.
+    """
+    while True:
+        crossing = [
+            d
+            for d, h in enumerate(heads)
+            if h != d and heads[h] != h and not _is_projective(heads, d)
+        ]
+        if not crossing:
+            return
+        d = min(crossing, key=lambda d: abs(heads[d] - d))
+        heads[d] = heads[heads[d]]
+
+
+def _rows_to_doc(vocab, rows, no_space_after):
+    index = {columns[0]: i for i, (_, columns) in enumerate(rows)}
+
+    words = []
+    spaces = []
+    lemmas = []
+    pos = []
+    tags = []
+    morphs = []
+    heads = []
+    deps = []
+    for i, (n, columns) in enumerate(rows):
+        id_, form, lemma, upos, xpos, feats, head, deprel, _, misc = columns
+        if head != "0" and head not in index:
+            raise ValueError(
+                "Line {}: invalid head `{}' for token {}".format(n, head, id_)
+            )
+        words.append(form)
+        spaces.append(
+            "SpaceAfter=No" not in misc.split("|") and id_ not in no_space_after
+        )
+        lemmas.append(form if lemma == "_" and form != "_" else lemma)
+        pos.append("X" if upos == "_" else upos)
+        tags.append("" if xpos == "_" else xpos)
+        morphs.append("" if feats == "_" else feats)
+        heads.append(i if head == "0" else index[head])
+        deps.append(deprel)
+    _check_heads(heads, rows[0][0])
+
+    mapped = _promote_copulas(pos, morphs, heads, deps)
+    _projectivize(heads)
+    for i, deprel in enumerate(deps):
+        if i in mapped:
+            continue
+        if deprel.split(":")[0] == "advmod" and _is_negation(morphs[i]):
+            deps[i] = "neg"
+        else:
+            deps[i] = _map_dep(deprel)
+    spaces[-1] = False
+
+    return Doc(
+        vocab,
+        words=words,
+        spaces=spaces,
+        lemmas=lemmas,
+        pos=pos,
+        tags=tags,
+        morphs=morphs,
+        heads=heads,
+        deps=deps,
+    )
+
+
+def _read_conllu_lines(lines, vocab):
+    rows = []
+    # IDs of the words of multiword tokens followed by no space
+    no_space_after = set()
+    for n, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            if rows:
+                yield _rows_to_doc(vocab, rows, no_space_after)
+                rows = []
+                no_space_after = set()
+            continue
+        if line.startswith("#"):
+            continue
+
+        columns = line.split("\t")
+        if len(columns) != 10:
+            raise ValueError(
+                "Line {}: expected 10 tab separated columns, got {}".format(
+                    n, len(columns)
+                )
+            )
+        # Multiword token ranges (e.g. `1-2') only carry the spacing of their
+        # words: there is no space within the range, and the space after its
+        # last word is given by the range. Empty nodes (e.g. `1.1') are skipped.
+        if "-" in columns[0]:
+            start, end = columns[0].split("-")
+            if not (start.isdigit() and end.isdigit()):
+                raise ValueError(
+                    "Line {}: invalid multiword token range `{}'".format(
+                        n, columns[0]
+                    )
+                )
+            no_space_after.update(str(i) for i in range(int(start), int(end)))
+            if "SpaceAfter=No" in columns[9].split("|"):
+                no_space_after.add(end)
+            continue
+        if "." in columns[0]:
+            continue
+        rows.append((n, columns))
+
+    if rows:
+        yield _rows_to_doc(vocab, rows, no_space_after)
+
+
+def read_conllu(
+    source: typing.Union[str, os.PathLike, typing.Iterable[str]],
+    vocab: typing.Optional[Vocab] = None,
+) -> typing.Iterator[Doc]:
+    """
+    Read sentences in CoNLL-U format into parsed `Doc`s, one per sentence.
+
+    Parameters
+    ----------
+    source : str, os.PathLike or iterable of str
+        Path to a CoNLL-U file, or an iterable of its lines (e.g. an open file).
+        Lines are consumed lazily.
+    vocab : Vocab, optional
+        Vocabulary of the `Doc`s. The default is a new, empty `Vocab`.
+
+    Yields
+    ------
+    Doc
+        A `Doc` with words, lemmas, part of speech tags, morphology, heads and
+        spacy dependency labels set.
+
+    """
+    if vocab is None:
+        vocab = Vocab()
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield from _read_conllu_lines(f, vocab)
+    else:
+        yield from _read_conllu_lines(source, vocab)
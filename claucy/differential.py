@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential testing of clause extraction engines
+
+Generates random (projective) dependency trees as pre-annotated `Doc`s, runs
+a reference and a candidate engine on them and compares the clause types,
+the spans of the clause constituents and the proposition sets. Mismatching
+trees are minimized before being reported, and the time spent in each engine
+is recorded so that the speedup of the candidate can be tracked.
+
+An engine is any callable with the signature of `extract_clauses`: it takes a
+`Span` and returns a list of `Clause`s (or objects with the same attributes
+and a `to_propositions` method).
+"""
+
+import random
+import time
+import typing
+
+from spacy.tokens import Doc, Span
+from spacy.vocab import Vocab
+
+from .claucy import dictionary, extract_clauses
+
+# Dependency labels generated under a head, by the part of speech of the head
+_CHILD_DEPS = {
+    "VERB": [
+        "nsubj",
+        "nsubjpass",
+        "dobj",
+        "dative",
+        "attr",
+        "acomp",
+        "ccomp",
+        "xcomp",
+        "prep",
+        "advmod",
+        "agent",
+        "aux",
+        "auxpass",
+        "conj",
+        "cc",
+        "advcl",
+        "punct",
+    ],
+    "NOUN": [
+        "det",
+        "amod",
+        "compound",
+        "poss",
+        "prep",
+        "appos",
+        "conj",
+        "cc",
+        "relcl",
+    ],
+    "ADJ": ["advmod", "conj", "cc", "prep"],
+    "ADP": ["pobj"],
+}
+_CHILD_DEPS["AUX"] = _CHILD_DEPS["VERB"]
+_CHILD_DEPS["PROPN"] = _CHILD_DEPS["NOUN"]
+
+# Part of speech of a token, by its dependency label
+_DEP_POS = {
+    "ROOT": ["VERB", "AUX"],
+    "ccomp": ["VERB"],
+    "xcomp": ["VERB"],
+    "advcl": ["VERB"],
+    "relcl": ["VERB"],
+    "conj": ["VERB", "NOUN", "PROPN"],
+    "aux": ["AUX"],
+    "auxpass": ["AUX"],
+    "acomp": ["ADJ"],
+    "amod": ["ADJ"],
+    "advmod": ["ADV"],
+    "det": ["DET"],
+    "prep": ["ADP"],
+    "agent": ["ADP"],
+    "cc": ["CCONJ"],
+    "punct": ["PUNCT"],
+}
+
+_VERB_LEMMAS = (
+    dictionary["non_ext_copular"]
+    + dictionary["ext_copular"]
+    + dictionary["complex_transitive"]
+)
+_ADV_LEMMAS = dictionary["adverbs_ignore"] + dictionary["adverbs_include"]
+
+
+class Tree:
+    def __init__(self, words, lemmas, pos, heads, deps):
+        """
+        A dependency tree, with heads as absolute token indices (the root is
+        its own head).
+        """
+        self.words = words
+        self.lemmas = lemmas
+        self.pos = pos
+        self.heads = heads
+        self.deps = deps
+
+    def __len__(self):
+        return len(self.words)
+
+    def __repr__(self):
+        return "\n".join(
+            "{}\t{}\t{}\t{}\t{}".format(i, w, p, h, d)
+            for i, (w, p, h, d) in enumerate(
+                zip(self.words, self.pos, self.heads, self.deps)
+            )
+        )
+
+    def to_doc(self, vocab):
+        return Doc(
+            vocab,
+            words=self.words,
+            lemmas=self.lemmas,
+            pos=self.pos,
+            heads=self.heads,
+            deps=self.deps,
+        )
+
+    def without(self, i):
+        """
+        Return a copy of the tree without the leaf token `i'.
+        """
+        keep = [j for j in range(len(self)) if j != i]
+        return Tree(
+            [self.words[j] for j in keep],
+            [self.lemmas[j] for j in keep],
+            [self.pos[j] for j in keep],
+            [h - (h > i) for h in (self.heads[j] for j in keep)],
+            [self.deps[j] for j in keep],
+        )
+
+    def leaves(self):
+        heads = set(h for j, h in enumerate(self.heads) if h != j)
+        return [j for j in range(len(self)) if j not in heads]
+
+
+def random_tree(rng: random.Random, n_tokens: int) -> Tree:
+    """
+    Generate a random projective dependency tree with `n_tokens' tokens.
+    """
+    nodes = [("ROOT", rng.choice(_DEP_POS["ROOT"]), [], [])]
+    while len(nodes) < n_tokens:
+        candidates = [
+            n for n, (_, pos, _, _) in enumerate(nodes) if pos in _CHILD_DEPS
+        ]
+        head = rng.choice(candidates)
+        dep = rng.choice(_CHILD_DEPS[nodes[head][1]])
+        if dep in _DEP_POS:
+            pos = rng.choice(_DEP_POS[dep])
+        else:
+            pos = rng.choice(["NOUN", "PROPN", "PRON"])
+        nodes.append((dep, pos, [], []))
+        # Attach as the outermost left or right child of the head
+        if rng.random() < 0.5:
+            nodes[head][2].insert(0, len(nodes) - 1)
+        else:
+            nodes[head][3].append(len(nodes) - 1)
+
+    # Linearize in order, which keeps the tree projective
+    order = []
+
+    def visit(n):
+        _, _, lefts, rights = nodes[n]
+        for c in lefts:
+            visit(c)
+        order.append(n)
+        for c in rights:
+            visit(c)
+
+    visit(0)
+    position = {n: i for i, n in enumerate(order)}
+    parent = {c: n for n, node in enumerate(nodes) for c in node[2] + node[3]}
+
+    words = []
+    lemmas = []
+    pos = []
+    heads = []
+    deps = []
+    for i, n in enumerate(order):
+        dep, p, _, _ = nodes[n]
+        if p in ["VERB", "AUX"]:
+            lemma = "be" if p == "AUX" else rng.choice(_VERB_LEMMAS)
+        elif p == "ADV":
+            lemma = rng.choice(_ADV_LEMMAS)
+        else:
+            lemma = "w{}".format(i)
+        words.append(lemma)
+        lemmas.append(lemma)
+        pos.append(p)
+        heads.append(position[parent[n]] if n in parent else i)
+        deps.append(dep)
+
+    return Tree(words, lemmas, pos, heads, deps)
+
+
+def _span_key(span):
+    if span is None:
+        return None
+    if isinstance(span, Span):
+        return (span.start, span.end)
+    return str(span)
+
+
+def clause_signature(clause):
+    """
+    Return a comparable summary of a clause: its type, the offsets of its
+    constituents and its set of propositions.
+    """
+    propositions = frozenset(
+        tuple(_span_key(s) for s in proposition)
+        for proposition in clause.to_propositions(as_text=False, inflect=None)
+    )
+    return (
+        clause.type,
+        _span_key(clause.subject),
+        _span_key(clause.verb),
+        _span_key(clause.indirect_object),
+        _span_key(clause.direct_object),
+        _span_key(clause.complement),
+        tuple(_span_key(a) for a in clause.adverbials),
+        propositions,
+    )
+
+
+def _run(engine, span):
+    try:
+        return [clause_signature(c) for c in engine(span)]
+    except Exception as e:
+        return ("error", type(e).__name__)
+
+
+def _mismatches(reference, candidate, tree, vocab):
+    span = tree.to_doc(vocab)[:]
+    expected = _run(reference, span)
+    got = _run(candidate, span)
+    return expected != got, expected, got
+
+
+def minimize(reference, candidate, tree: Tree, vocab: Vocab) -> Tree:
+    """
+    Remove leaf tokens from `tree' for as long as the engines still disagree.
+    """
+    reduced = True
+    while reduced:
+        reduced = False
+        for i in tree.leaves():
+            if len(tree) == 1:
+                break
+            smaller = tree.without(i)
+            if _mismatches(reference, candidate, smaller, vocab)[0]:
+                tree = smaller
+                reduced = True
+                break
+    return tree
+
+
+class Mismatch:
+    def __init__(self, index, tree, expected, got):
+        """
+        Parameters
+        ----------
+        index : int
+            Index of the generated tree.
+        tree : Tree
+            Minimized tree on which the engines disagree.
+        expected : list
+            Clause signatures of the reference engine.
+        got : list
+            Clause signatures of the candidate engine.
+
+        """
+        self.index = index
+        self.tree = tree
+        self.expected = expected
+        self.got = got
+
+    def __repr__(self):
+        return "<Mismatch #{}\n{}\nexpected: {}\ngot: {}>".format(
+            self.index, self.tree, self.expected, self.got
+        )
+
+
+def _time(engine, spans):
+    """
+    Return the time spent extracting clauses and generating their propositions
+    (excluding the building of clause signatures).
+    """
+    extraction_time = 0.0
+    propositions_time = 0.0
+    for span in spans:
+        start = time.perf_counter()
+        clauses = engine(span)
+        extraction_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for clause in clauses:
+            clause.to_propositions(as_text=False, inflect=None)
+        propositions_time += time.perf_counter() - start
+    return extraction_time, propositions_time
+
+
+def _is_error(result):
+    return isinstance(result, tuple) and result[0] == "error"
+
+
+class DifferentialReport:
+    def __init__(
+        self, n_docs, mismatches, n_timed_docs, reference_times, candidate_times
+    ):
+        """
+        Parameters
+        ----------
+        n_docs : int
+            Number of compared trees.
+        mismatches : list
+            List of `Mismatch`es.
+        n_timed_docs : int
+            Number of trees on which neither engine raised an exception. Only
+            these are timed.
+        reference_times : tuple
+            Time (in seconds) spent by the reference engine extracting clauses
+            and generating their propositions, in its fastest run.
+        candidate_times : tuple
+            Same as `reference_times', for the candidate engine.
+
+        """
+        self.n_docs = n_docs
+        self.mismatches = mismatches
+        self.n_timed_docs = n_timed_docs
+        self.reference_times = reference_times
+        self.candidate_times = candidate_times
+
+    @staticmethod
+    def _ratio(reference_time, candidate_time):
+        if candidate_time == 0:
+            return float("inf")
+        return reference_time / candidate_time
+
+    @property
+    def speedup(self):
+        return self._ratio(sum(self.reference_times), sum(self.candidate_times))
+
+    @property
+    def extraction_speedup(self):
+        return self._ratio(self.reference_times[0], self.candidate_times[0])
+
+    @property
+    def propositions_speedup(self):
+        return self._ratio(self.reference_times[1], self.candidate_times[1])
+
+    def __repr__(self):
+        return "<DifferentialReport: {} docs, {} mismatches, speedup {:.2f}x>".format(
+            self.n_docs, len(self.mismatches), self.speedup
+        )
+
+
+def compare_engines(
+    candidate: typing.Callable,
+    reference: typing.Callable = extract_clauses,
+    n_docs: int = 1000,
+    min_tokens: int = 1,
+    max_tokens: int = 40,
+    seed: int = 0,
+    repeat: int = 5,
+) -> DifferentialReport:
+    """
+    Compare a candidate clause extraction engine with the reference one.
+
+    Parameters
+    ----------
+    candidate : callable
+        Engine under test.
+    reference : callable, optional
+        Reference engine. The default is `extract_clauses`.
+    n_docs : int, optional
+        Number of random trees. The default is 1000.
+    min_tokens : int, optional
+        Minimum number of tokens per tree. The default is 1.
+    max_tokens : int, optional
+        Maximum number of tokens per tree. The default is 40.
+    seed : int, optional
+        Seed of the random trees. The default is 0.
+    repeat : int, optional
+        Number of timed runs of each engine (at least 1), after an untimed
+        warm-up run. Runs of the two engines are interleaved and the fastest
+        run of each engine is kept. Trees on which either engine raises an
+        exception are not timed. The default is 5.
+
+    Returns
+    -------
+    DifferentialReport
+        Minimized mismatches and the time spent in each engine.
+
+    """
+    if repeat < 1:
+        raise ValueError("`repeat' must be at least 1, got {}".format(repeat))
+
+    rng = random.Random(seed)
+    vocab = Vocab()
+
+    trees = [
+        random_tree(rng, rng.randint(min_tokens, max_tokens)) for _ in range(n_docs)
+    ]
+    spans = [tree.to_doc(vocab)[:] for tree in trees]
+
+    # The (untimed) comparison also warms up both engines
+    expected = [_run(reference, span) for span in spans]
+    got = [_run(candidate, span) for span in spans]
+
+    # An engine that raises early would otherwise look faster
+    timed_spans = [
+        span
+        for span, e, g in zip(spans, expected, got)
+        if not (_is_error(e) or _is_error(g))
+    ]
+
+    reference_runs = []
+    candidate_runs = []
+    for n in range(repeat):
+        # Alternate which engine runs first
+        if n % 2:
+            candidate_runs.append(_time(candidate, timed_spans))
+            reference_runs.append(_time(reference, timed_spans))
+        else:
+            reference_runs.append(_time(reference, timed_spans))
+            candidate_runs.append(_time(candidate, timed_spans))
+    reference_times = min(reference_runs, key=sum)
+    candidate_times = min(candidate_runs, key=sum)
+
+    mismatches = []
+    for index, tree in enumerate(trees):
+        if expected[index] != got[index]:
+            minimized = minimize(reference, candidate, tree, vocab)
+            _, e, g = _mismatches(reference, candidate, minimized, vocab)
+            mismatches.append(Mismatch(index, minimized, e, g))
+
+    return DifferentialReport(
+        n_docs, mismatches, len(timed_spans), reference_times, candidate_times
+    )
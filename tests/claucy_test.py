@@ -2,8 +2,18 @@ import os, sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import statistics
+import subprocess
 import unittest
 import claucy
+import claucy.differential
+
+from spacy.vocab import Vocab
+
+# Budget for the time spent importing `claucy', excluding spacy, relative to
+# the time spent importing `spacy.matcher' in the same run, as reported by
+# `python -X importtime'. Importing spacy itself is out of scope.
+IMPORT_TIME_BUDGET = 1.0
 
 # The below patterns are taken from Table 1 from the paper
 sentences = [
@@ -85,6 +95,80 @@ sentences_with_complex_structure = [
      {'<SV, He, ate, None, None, None, []>', '<SV, He, drank, None, None, None, []>', '<SV, He, danced, None, None, None, []>'})]
 
 
+# Pre-parsed (Universal Dependencies) sentences, their clauses and propositions
+conllu_sentences = [
+    (
+        """# text = AE died in Princeton in 1955.
+1\tAE\tAE\tPROPN\tNNP\tNumber=Sing\t2\tnsubj\t_\t_
+2\tdied\tdie\tVERB\tVBD\tTense=Past\t0\troot\t_\t_
+3\tin\tin\tADP\tIN\t_\t4\tcase\t_\t_
+4\tPrinceton\tPrinceton\tPROPN\tNNP\tNumber=Sing\t2\tobl\t_\t_
+5\tin\tin\tADP\tIN\t_\t6\tcase\t_\t_
+6\t1955\t1955\tNUM\tCD\t_\t2\tobl\t_\tSpaceAfter=No
+7\t.\t.\tPUNCT\t.\t_\t2\tpunct\t_\t_
+""",
+        {"<SV, AE, died, None, None, None, [in Princeton, in 1955]>"},
+        {"AE died in Princeton", "AE died in 1955", "AE died in Princeton in 1955"},
+    ),
+    (
+        """# text = AE is a scientist of the 20th century.
+1\tAE\tAE\tPROPN\tNNP\t_\t4\tnsubj\t_\t_
+2\tis\tbe\tAUX\tVBZ\t_\t4\tcop\t_\t_
+3\ta\ta\tDET\tDT\t_\t4\tdet\t_\t_
+4\tscientist\tscientist\tNOUN\tNN\t_\t0\troot\t_\t_
+5\tof\tof\tADP\tIN\t_\t8\tcase\t_\t_
+6\tthe\tthe\tDET\tDT\t_\t8\tdet\t_\t_
+7\t20th\t20th\tADJ\tJJ\t_\t8\tamod\t_\t_
+8\tcentury\tcentury\tNOUN\tNN\t_\t4\tnmod\t_\tSpaceAfter=No
+9\t.\t.\tPUNCT\t.\t_\t4\tpunct\t_\t_
+""",
+        {"<SVC, AE, is, None, None, a scientist of the 20th century, []>"},
+        {"AE is a scientist"},
+    ),
+    (
+        """1\tRSAS\tRSAS\tPROPN\tNNP\t_\t2\tnsubj\t_\t_
+2\tgave\tgive\tVERB\tVBD\t_\t0\troot\t_\t_
+3\tAE\tAE\tPROPN\tNNP\t_\t2\tiobj\t_\t_
+4\tthe\tthe\tDET\tDT\t_\t6\tdet\t_\t_
+5\tNobel\tNobel\tPROPN\tNNP\t_\t6\tcompound\t_\t_
+6\tPrize\tPrize\tPROPN\tNNP\t_\t2\tobj\t_\tSpaceAfter=No
+7\t.\t.\tPUNCT\t.\t_\t2\tpunct\t_\t_
+""",
+        {"<SVOO, RSAS, gave, AE, the Nobel Prize, None, []>"},
+        {"RSAS gave AE the Nobel Prize"},
+    ),
+    (
+        """# text = AE is smart and is kind.
+1\tAE\tAE\tPROPN\tNNP\t_\t3\tnsubj\t_\t_
+2\tis\tbe\tAUX\tVBZ\t_\t3\tcop\t_\t_
+3\tsmart\tsmart\tADJ\tJJ\t_\t0\troot\t_\t_
+4\tand\tand\tCCONJ\tCC\t_\t6\tcc\t_\t_
+5\tis\tbe\tAUX\tVBZ\t_\t6\tcop\t_\t_
+6\tkind\tkind\tADJ\tJJ\t_\t3\tconj\t_\tSpaceAfter=No
+7\t.\t.\tPUNCT\t.\t_\t3\tpunct\t_\t_
+""",
+        {
+            "<SVC, AE, is, None, None, smart, []>",
+            "<SVC, AE, is, None, None, kind, []>",
+        },
+        {"AE is smart", "AE is kind"},
+    ),
+    (
+        # Non-projective: `issue' attaches to `hearing' across the verb
+        """# text = A hearing was scheduled on issue today
+1\tA\ta\tDET\tDT\t_\t2\tdet\t_\t_
+2\thearing\thearing\tNOUN\tNN\t_\t4\tnsubj:pass\t_\t_
+3\twas\tbe\tAUX\tVBD\t_\t4\taux:pass\t_\t_
+4\tscheduled\tschedule\tVERB\tVBN\t_\t0\troot\t_\t_
+5\ton\ton\tADP\tIN\t_\t6\tcase\t_\t_
+6\tissue\tissue\tNOUN\tNN\t_\t2\tnmod\t_\t_
+7\ttoday\ttoday\tNOUN\tNN\t_\t4\tobl:tmod\t_\t_
+""",
+        {"<SV, A hearing, was scheduled, None, None, None, [on issue]>"},
+        {"A hearing was scheduled on issue"},
+    ),
+]
+
 
 class Test_ClauCy(unittest.TestCase):
     def test_parse(self):
@@ -149,5 +233,188 @@ class Test_ClauCy(unittest.TestCase):
                             == set(map(repr, doc._.clauses)))
 
 
+class Test_CoNLLU(unittest.TestCase):
+    def test_read_conllu(self):
+        text = "\n".join(sent[0] for sent in conllu_sentences)
+        docs = list(claucy.read_conllu(text.splitlines(keepends=True)))
+        self.assertEqual(len(docs), len(conllu_sentences))
+        self.assertEqual(docs[0].text, "AE died in Princeton in 1955.")
+        self.assertEqual(
+            [t.dep_ for t in docs[1]],
+            ["nsubj", "ROOT", "det", "attr", "case", "det", "amod", "prep", "punct"],
+        )
+        self.assertEqual(docs[2][2].dep_, "dative")
+        self.assertEqual(docs[2][5].dep_, "dobj")
+
+    def test_multiword_token_spacing(self):
+        lines = [
+            "1-2\tdon't\t_\t_\t_\t_\t_\t_\t_\t_",
+            "1\tdo\tdo\tAUX\tVBP\t_\t3\taux\t_\t_",
+            "2\tn't\tnot\tPART\tRB\tPolarity=Neg\t3\tadvmod\t_\t_",
+            "3\tgo\tgo\tVERB\tVB\t_\t0\troot\t_\tSpaceAfter=No",
+            "4-5\tgimme\t_\t_\t_\t_\t_\t_\t_\tSpaceAfter=No",
+            "4\tgim\tgive\tVERB\tVB\t_\t3\tconj\t_\t_",
+            "5\tme\tI\tPRON\tPRP\t_\t4\tiobj\t_\t_",
+            "6\t.\t.\tPUNCT\t.\t_\t3\tpunct\t_\t_",
+        ]
+        (doc,) = claucy.read_conllu(lines)
+        self.assertEqual(doc.text, "don't gogimme.")
+        self.assertEqual(doc[1].dep_, "neg")
+
+    def test_malformed_line(self):
+        with self.assertRaisesRegex(ValueError, "Line 1:"):
+            list(claucy.read_conllu(["1\tAE\tAE\n"]))
+
+    def test_invalid_heads(self):
+        root = "1\tAE\tAE\tPROPN\t_\t_\t0\troot\t_\t_"
+        sentences = [
+            # Missing head
+            ("Line 2:", [root, "2\tdied\tdie\tVERB\t_\t_\t_\t_\t_\t_"]),
+            # Dangling head
+            ("Line 2:", [root, "2\tdied\tdie\tVERB\t_\t_\t7\tdep\t_\t_"]),
+            # No root
+            (
+                "Sentence at line 1: heads form a cycle",
+                [
+                    "1\tAE\tAE\tPROPN\t_\t_\t2\tnsubj\t_\t_",
+                    "2\tdied\tdie\tVERB\t_\t_\t1\tdep\t_\t_",
+                ],
+            ),
+        ]
+        for message, lines in sentences:
+            with self.assertRaisesRegex(ValueError, message):
+                list(claucy.read_conllu(lines))
+
+    def test_extract_clauses_from_conllu(self):
+        for text, expected_clauses, expected_propositions in conllu_sentences:
+            (doc,) = claucy.read_conllu(text.splitlines())
+            claucy.extract_clauses_doc(doc)
+            self.assertEqual(expected_clauses, set(map(repr, doc._.clauses)))
+
+            propositions = set()
+            for clause in doc._.clauses:
+                propositions.update(
+                    clause.to_propositions(as_text=True, inflect=None)
+                )
+            self.assertEqual(expected_propositions, propositions)
+
+
+class Test_Propositions(unittest.TestCase):
+    def test_ignored_argument_warns_once(self):
+        text = conllu_sentences[0][0]
+        (doc,) = claucy.read_conllu(text.splitlines())
+        clause = claucy.extract_clauses(doc[:])[0]
+
+        claucy.claucy._warned_arguments.clear()
+        with self.assertLogs("claucy.claucy", level="WARNING") as logs:
+            for _ in range(3):
+                clause.to_propositions()
+                clause.to_propositions(capitalize=True)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("inflect", logs.records[0].getMessage())
+        self.assertIn("capitalize", logs.records[1].getMessage())
+
+
+class Test_Differential(unittest.TestCase):
+    def test_reference_matches_itself(self):
+        report = claucy.differential.compare_engines(
+            claucy.extract_clauses, n_docs=200
+        )
+        self.assertEqual(report.mismatches, [])
+        self.assertEqual(report.n_timed_docs, 200)
+        self.assertEqual(len(report.reference_times), 2)
+        self.assertEqual(len(report.candidate_times), 2)
+        self.assertTrue(
+            all(t > 0 for t in report.reference_times + report.candidate_times)
+        )
+
+    def test_errors_are_not_timed(self):
+        def fail_on_verbs(span):
+            if any(t.pos_ == "VERB" for t in span):
+                raise RuntimeError
+            return claucy.extract_clauses(span)
+
+        report = claucy.differential.compare_engines(fail_on_verbs, n_docs=50)
+        self.assertGreater(len(report.mismatches), 0)
+        self.assertEqual(report.n_timed_docs, 50 - len(report.mismatches))
+
+    def test_repeat_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            claucy.differential.compare_engines(
+                claucy.extract_clauses, n_docs=1, repeat=0
+            )
+
+    def test_mismatches_are_minimized(self):
+        def drop_adverbials(span):
+            clauses = claucy.extract_clauses(span)
+            for clause in clauses:
+                clause.adverbials = []
+            return clauses
+
+        def signatures(engine, tree):
+            span = tree.to_doc(vocab)[:]
+            return list(map(claucy.differential.clause_signature, engine(span)))
+
+        vocab = Vocab()
+        report = claucy.differential.compare_engines(drop_adverbials, n_docs=50)
+        self.assertGreater(len(report.mismatches), 0)
+        for mismatch in report.mismatches:
+            self.assertNotEqual(mismatch.expected, mismatch.got)
+            # Removing any remaining leaf makes the engines agree
+            for i in mismatch.tree.leaves():
+                smaller = mismatch.tree.without(i)
+                self.assertEqual(
+                    signatures(claucy.extract_clauses, smaller),
+                    signatures(drop_adverbials, smaller),
+                )
+
+
+class Test_Import(unittest.TestCase):
+    def _importtime(self, code):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        # Allow bytecode caching, otherwise compilation is measured too
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, module = line[len("import time:"):].split("|")
+            times[module.strip()] = (int(self_us), int(cumulative_us))
+        return times, result.stdout
+
+    def test_lemminflect_not_imported(self):
+        times, _ = self._importtime("import claucy")
+        self.assertIn("claucy", times)
+        self.assertNotIn("lemminflect", times)
+
+    def test_no_global_logging_setup(self):
+        _, out = self._importtime(
+            "import logging, claucy; print(len(logging.getLogger().handlers))"
+        )
+        self.assertEqual(out.strip(), "0")
+
+    def test_import_time_budget(self):
+        def relative_import_time():
+            times, _ = self._importtime("import claucy")
+            claucy_us = times["claucy"][1] - times["spacy"][1]
+            return claucy_us / times["spacy.matcher"][1]
+
+        # Median of a few runs, to be robust to a busy machine and to the
+        # first run compiling the sources
+        self.assertLess(
+            statistics.median(relative_import_time() for _ in range(5)),
+            IMPORT_TIME_BUDGET,
+        )
+
+
 if __name__ == "__main__":
     unittest.main()